@@ -1,130 +1,46 @@
-from flask import Flask, render_template, request, jsonify, send_file
-import pandas as pd
-import itertools
+from flask import Flask, Response, render_template, request, jsonify, send_file
+import csv
+import io
 import os
-import tempfile
-from collections import defaultdict
 import json
+from loader import PYPY
+from matcher import build_groups, find_common_slots
 
-app = Flask(__name__)
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  
-
-FAITH_STUDIES = ["discovery", "source", "growth", "trust", "commission"]
-
-def get_next_faith_study(completed):
-    """Determine the next faith study based on completed ones."""
-    if pd.isna(completed):
-        return FAITH_STUDIES[0]  # If blank, start at Discovery
-    completed_lower = [c.strip().lower() for c in str(completed).split(",") if c.strip()]
-    for study in FAITH_STUDIES:
-        if study not in completed_lower:
-            return study
-    return None  # already completed all
-
-def has_led(study, led_str):
-    """Check if a person already led this study."""
-    if pd.isna(led_str):
-        return False
-    led_lower = [c.strip().lower() for c in str(led_str).split(",") if c.strip()]
-    return study in led_lower
-
-def find_common_slots(avail_dicts):
-    """Return list of all availability slots common to everyone in the group."""
-    if not avail_dicts:
-        return []
-    
-    # For each person, find all time slots they're available
-    person_available_slots = []
-    for avail in avail_dicts:
-        available_slots = []
-        for slot, value in avail.items():
-            if pd.notna(value) and str(value).strip():
-                # Check if the value contains day names (like "Fridays", "Mondays, Wednesdays")
-                value_str = str(value).strip()
-                if any(day in value_str.lower() for day in ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']):
-                    available_slots.append(slot)
-        person_available_slots.append(set(available_slots))
-    
-    if not person_available_slots:
-        return []
-    
-    # Find intersection of all available slots
-    common_slots = set.intersection(*person_available_slots)
-    return sorted(list(common_slots))
-
-def process_csv_data(df):
-    """Process the CSV data and return people and groups."""
-    # Identify availability columns (everything after "Faith Studies Led")
+# orjson has no PyPy build, so fall back to flask.jsonify there or when it is missing
+orjson = None
+if not PYPY:
     try:
-        led_col_index = df.columns.get_loc("Please indicate which faith studies you have led:")
-        availability_cols = df.columns[led_col_index+1:]
-    except KeyError:
-        # look for columns containing time slots
-        availability_cols = [col for col in df.columns if 'timeslot' in col.lower() or '[' in col and ']' in col]
-    
-    people = []
-    for _, row in df.iterrows():
-        next_study = get_next_faith_study(row.get("Please indicate which faith studies you've completed.", ""))
-        person = {
-            "id": f"{row.get('First Name', '')}_{row.get('Last Name', '')}_{len(people)}",
-            "first": row.get("First Name", ""),
-            "last": row.get("Last Name", ""),
-            "gender": row.get("Please indicate your gender.", "").strip().lower(),
-            "email": row.get("E-mail Address", ""),
-            "phone": row.get("Cell Phone Number", ""),
-            "year": row.get("What year of study are you currently in?", ""),
-            "program": row.get("What is your program of study?", ""),
-            "religion": row.get("Which religion/faith do you most identify with?", ""),
-            "next_study": next_study,
-            "willing_lead": str(row.get("Are you willing to lead a Faith Study?", "")).strip().lower() == "yes",
-            "already_led": row.get("Please indicate which faith studies you have led:", ""),
-            "avail": {col: str(row[col]).strip() for col in availability_cols}
-        }
-        people.append(person)
-
-    # Group people by gender + next faith study
-    grouped = defaultdict(list)
-    for p in people:
-        # Only include people who have a next study and valid gender
-        if p["next_study"] and p["gender"] and p["gender"].strip():
-            grouped[(p["gender"], p["next_study"])].append(p)
-
-    results = []
-    group_counter = 1
+        import orjson
+    except ImportError:
+        pass
 
-    for (gender, study), members in grouped.items():
-        # Generate groups of 2–5 people
-        for size in range(5, 1, -1):  # try larger groups first
-            for combo in itertools.combinations(members, size):
-                combo = list(combo)
-                common = find_common_slots([m["avail"] for m in combo])
-                if common:  # only valid if they share a slot
-                    leader = None
-                    for m in combo:
-                        if m["willing_lead"] and not has_led(study, m["already_led"]):
-                            leader = m["id"]
-                            break
-
-                    group_data = {
-                        "id": f"G{group_counter}",
-                        "faith_study": study.capitalize(),
-                        "gender": gender.capitalize(),
-                        "leader": leader,
-                        "members": [m["id"] for m in combo],
-                        "common_availabilities": common,
-                        "member_details": {m["id"]: {
-                            "name": f"{m['first']} {m['last']}",
-                            "email": m["email"],
-                            "phone": m["phone"],
-                            "year": m["year"],
-                            "program": m["program"]
-                        } for m in combo}
-                    }
-                    results.append(group_data)
-                    group_counter += 1
-                    break  # Only take the first valid group of this size
+app = Flask(__name__)
+app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  
 
-    return results, people
+def fast_jsonify(obj):
+    """Serialize obj with orjson; unknown types fall back to str()."""
+    if orjson is None:
+        return jsonify(obj)
+    return Response(orjson.dumps(obj, default=str, option=orjson.OPT_SERIALIZE_NUMPY),
+                    mimetype='application/json')
+
+def fast_pack(obj):
+    """Serialize obj as MessagePack if the client prefers it, otherwise JSON."""
+    best = request.accept_mimetypes.best_match(['application/json', 'application/msgpack'])
+    ormsgpack = None
+    if best == 'application/msgpack' and not PYPY:
+        try:
+            import ormsgpack  # only needed by clients that opt in
+        except ImportError:
+            pass
+    if ormsgpack is None:
+        resp = fast_jsonify(obj)
+    else:
+        resp = Response(ormsgpack.packb(obj, default=str, option=ormsgpack.OPT_SERIALIZE_NUMPY),
+                        mimetype='application/msgpack')
+    # The body depends on Accept, so caches must key on it
+    resp.vary.add('Accept')
+    return resp
 
 @app.route('/')
 def index():
@@ -136,48 +52,49 @@ def upload_file():
     
     if 'file' not in request.files:
         print("No 'file' key in request.files")
-        return jsonify({'error': 'No file uploaded'}), 400
+        return fast_jsonify({'error': 'No file uploaded'}), 400
     
     file = request.files['file']
     print(f"File received: {file.filename}, size: {file.content_length}")
     
     if file.filename == '':
         print("Empty filename")
-        return jsonify({'error': 'No file selected'}), 400
+        return fast_jsonify({'error': 'No file selected'}), 400
     
     try:
         # Read the uploaded file
         print(f"Attempting to read file: {file.filename}")
-        if file.filename.endswith('.csv'):
-            df = pd.read_csv(file)
-            print(f"CSV read successfully. Shape: {df.shape}")
-        elif file.filename.endswith(('.xlsx', '.xls')):
-            df = pd.read_excel(file)
-            print(f"Excel read successfully. Shape: {df.shape}")
-        else:
+        if not file.filename.endswith(('.csv', '.xlsx', '.xls')):
             print(f"Unsupported file format: {file.filename}")
-            return jsonify({'error': 'Unsupported file format. Please upload CSV or Excel files.'}), 400
+            return fast_jsonify({'error': 'Unsupported file format. Please upload CSV or Excel files.'}), 400
+        from loader import load_rows
+        rows = load_rows(file.stream, file.filename)
+        print(f"File read successfully. Rows: {len(rows)}")
+        
+        if not rows:
+            return fast_jsonify({'error': 'No valid people found in the data'}), 400
         
         # Check for required columns
-        print(f"DataFrame columns: {list(df.columns)}")
+        columns = list(rows[0])
+        print(f"Columns: {columns}")
         required_columns = [
             "First Name", "Last Name", "Please indicate your gender.",
             "Please indicate which faith studies you've completed.",
             "Are you willing to lead a Faith Study?"
         ]
         
-        missing_columns = [col for col in required_columns if col not in df.columns]
+        missing_columns = [col for col in required_columns if col not in columns]
         if missing_columns:
             print(f"Missing columns: {missing_columns}")
-            return jsonify({'error': f'Missing required columns: {", ".join(missing_columns)}'}), 400
+            return fast_jsonify({'error': f'Missing required columns: {", ".join(missing_columns)}'}), 400
         
         # Process the data
-        groups, people = process_csv_data(df)
+        groups, people = build_groups(rows)
         
         if not people:
-            return jsonify({'error': 'No valid people found in the data'}), 400
+            return fast_jsonify({'error': 'No valid people found in the data'}), 400
         
-        return jsonify({
+        return fast_pack({
             'success': True,
             'groups': groups,
             'people': people,
@@ -186,7 +103,7 @@ def upload_file():
         })
         
     except Exception as e:
-        return jsonify({'error': f'Error processing file: {str(e)}'}), 500
+        return fast_jsonify({'error': f'Error processing file: {str(e)}'}), 500
 
 @app.route('/validate_move', methods=['POST'])
 def validate_move():
@@ -198,35 +115,37 @@ def validate_move():
     people = data.get('people')
     
     # Find the person and groups
-    person = next((p for p in people if p['id'] == person_id), None)
-    from_group = next((g for g in groups if g['id'] == from_group_id), None)
-    to_group = next((g for g in groups if g['id'] == to_group_id), None)
+    people_by_id = {p['id']: p for p in people}
+    groups_by_id = {g['id']: g for g in groups}
+    person = people_by_id.get(person_id)
+    from_group = groups_by_id.get(from_group_id)
+    to_group = groups_by_id.get(to_group_id)
     
     if not person or not from_group or not to_group:
-        return jsonify({'valid': False, 'reason': 'Person or group not found'})
+        return fast_jsonify({'valid': False, 'reason': 'Person or group not found'})
     
     # Check if person can be moved to the target group
     # 1. Same gender and faith study
     if (person['gender'] != to_group['gender'].lower() or 
         person['next_study'] != to_group['faith_study'].lower()):
-        return jsonify({'valid': False, 'reason': 'Gender or faith study mismatch'})
+        return fast_jsonify({'valid': False, 'reason': 'Gender or faith study mismatch'})
     
     # 2. Check group size limits
     if len(to_group['members']) >= 5:
-        return jsonify({'valid': False, 'reason': 'Target group is full (max 5 people)'})
+        return fast_jsonify({'valid': False, 'reason': 'Target group is full (max 5 people)'})
     
     if len(from_group['members']) <= 2:
-        return jsonify({'valid': False, 'reason': 'Source group would be too small (min 2 people)'})
+        return fast_jsonify({'valid': False, 'reason': 'Source group would be too small (min 2 people)'})
     
     # 3. Check availability compatibility
-    to_group_members = [p for p in people if p['id'] in to_group['members']]
+    to_group_members = [people_by_id[pid] for pid in to_group['members'] if pid in people_by_id]
     to_group_members.append(person)
-    common_slots = find_common_slots([m['avail'] for m in to_group_members])
+    common_slots = find_common_slots([m['avail_slots'] for m in to_group_members])
     
     if not common_slots:
-        return jsonify({'valid': False, 'reason': 'No common availability slots'})
+        return fast_jsonify({'valid': False, 'reason': 'No common availability slots'})
     
-    return jsonify({'valid': True, 'common_slots': common_slots})
+    return fast_jsonify({'valid': True, 'common_slots': common_slots})
 
 @app.route('/export', methods=['POST'])
 def export_groups():
@@ -254,13 +173,16 @@ def export_groups():
             'Common Availabilities': ', '.join(group['common_availabilities'])
         })
     
-    # Create temporary CSV file
-    df = pd.DataFrame(export_data)
-    temp_file = tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False)
-    df.to_csv(temp_file.name, index=False)
-    temp_file.close()
+    # Build the CSV in memory rather than on disk
+    columns = ['Group ID', 'Faith Study', 'Gender', 'Leader', 'Members', 'Common Availabilities']
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(columns)
+    for row in export_data:
+        writer.writerow([row[col] for col in columns])
+    payload = buf.getvalue().encode()
     
-    return send_file(temp_file.name, as_attachment=True, 
+    return send_file(io.BytesIO(payload), as_attachment=True, 
                     download_name='faith_study_groups.csv',
                     mimetype='text/csv')
 
@@ -268,18 +190,20 @@ def export_groups():
 def debug():
     """Debug endpoint to test with sample data"""
     try:
-        df = pd.read_csv("Winter 2025 UTM Faith Study Sign Up (Responses) - Form Responses 1.csv")
-        groups, people = process_csv_data(df)
-        return jsonify({
+        path = "Winter 2025 UTM Faith Study Sign Up (Responses) - Form Responses 1.csv"
+        from loader import load_rows
+        rows = load_rows(path, path)
+        groups, people = build_groups(rows)
+        return fast_jsonify({
             'success': True,
             'groups': groups[:3],  # First 3 groups for debugging
             'people': people[:5],  # First 5 people for debugging
             'total_people': len(people),
             'total_groups': len(groups),
-            'columns': list(df.columns)
+            'columns': list(rows[0]) if rows else []
         })
     except Exception as e:
-        return jsonify({'error': str(e), 'traceback': str(e)})
+        return fast_jsonify({'error': str(e), 'traceback': str(e)})
 
 if __name__ == '__main__':
     app.run(debug=True)
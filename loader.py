@@ -0,0 +1,33 @@
+"""Load uploaded sign-up responses into plain row dicts for the matcher."""
+import csv
+import io
+import platform
+
+PYPY = platform.python_implementation() == "PyPy"
+
+def _read_csv_stdlib(file):
+    """Read a CSV path or binary stream with the stdlib csv module."""
+    if isinstance(file, str):
+        with open(file, newline="", encoding="utf-8-sig") as f:
+            return list(csv.DictReader(f))
+    return list(csv.DictReader(io.TextIOWrapper(file, encoding="utf-8-sig", newline="")))
+
+def _read_excel(file):
+    """Read an Excel workbook with pandas."""
+    import pandas as pd
+    return pd.read_excel(file).to_dict(orient="records")
+
+def load_rows(file, filename):
+    """Read a CSV or Excel upload and return one dict per response row."""
+    # pyarrow/pandas are imported on first use so other routes never load them
+    if filename.endswith('.csv'):
+        if PYPY:
+            return _read_csv_stdlib(file)
+        import pyarrow.csv as pacsv
+        # Form exports put paragraph answers in quoted fields with embedded newlines
+        table = pacsv.read_csv(file, read_options=pacsv.ReadOptions(use_threads=True),
+                               parse_options=pacsv.ParseOptions(newlines_in_values=True))
+        return table.to_pylist()
+    if filename.endswith(('.xlsx', '.xls')):
+        return _read_excel(file)
+    raise ValueError(f"Unsupported file format: {filename}")
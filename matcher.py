@@ -0,0 +1,185 @@
+"""Pure-Python grouping logic for faith study sign-up responses."""
+import re
+from collections import defaultdict
+from functools import reduce
+from operator import and_
+
+FAITH_STUDIES = ["discovery", "source", "growth", "trust", "commission"]
+_DAY_RE = re.compile(r'(?i)(?:mon|tues|wednes|thurs|fri|satur|sun)day')
+
+def is_missing(value):
+    """Return True for empty cells (None or NaN) without going through pandas."""
+    return value is None or (isinstance(value, float) and value != value)
+
+def cell_text(value):
+    """Return a cell as a stripped string, with blank cells as ""."""
+    if is_missing(value):
+        return ""
+    return str(value).strip()
+
+def parse_study_list(value):
+    """Parse a comma-separated list of studies into a lowercase frozenset."""
+    if is_missing(value):
+        return frozenset()
+    return frozenset(c.strip().lower() for c in str(value).split(",") if c.strip())
+
+def get_next_faith_study(completed_set):
+    """Determine the next faith study based on completed ones."""
+    for study in FAITH_STUDIES:
+        if study not in completed_set:
+            return study  # If blank, this is Discovery
+    return None  # already completed all
+
+def has_led(study, already_led_set):
+    """Check if a person already led this study."""
+    return study in already_led_set
+
+def find_common_slots(slot_sets):
+    """Return list of all availability slots common to everyone in the group."""
+    if not slot_sets:
+        return []
+    
+    # Find intersection of everyone's precomputed slots
+    common_slots = frozenset(slot_sets[0]).intersection(*slot_sets[1:])
+    return sorted(common_slots)
+
+def availability_mask(values):
+    """Encode the slots a person has marked as a bitmask over the slot columns."""
+    mask = 0
+    for slot_id, value in enumerate(values):
+        # A slot counts when its value names a day (like "Fridays", "Mondays, Wednesdays")
+        if _DAY_RE.search(value) is not None:
+            mask |= 1 << slot_id
+    return mask
+
+def mask_to_slots(mask, slot_names):
+    """Decode a slot bitmask back into a sorted list of slot names."""
+    return sorted(name for i, name in enumerate(slot_names) if mask >> i & 1)
+
+def split_into_groups(candidates, max_size=5):
+    """Split candidates into evenly sized chunks of at most max_size people."""
+    num_groups = -(-len(candidates) // max_size)
+    base, extra = divmod(len(candidates), num_groups)
+    chunks = []
+    start = 0
+    for i in range(num_groups):
+        size = base + (1 if i < extra else 0)
+        chunks.append(candidates[start:start + size])
+        start += size
+    return chunks
+
+def group_bucket(members, masks, num_slots):
+    """Split one (gender, study) bucket into groups of 2-5 people sharing a slot."""
+    if len(members) < 2:
+        return []
+
+    # If the whole bucket fits in one group and shares a slot, skip the slot scan
+    if len(members) <= 5 and reduce(and_, (masks[m["id"]] for m in members)):
+        return [members]
+
+    # Bucket members by every slot they are available for
+    slot_to_people = defaultdict(list)
+    for m in members:
+        mask = masks[m["id"]]
+        for slot_id in range(num_slots):
+            if mask >> slot_id & 1:
+                slot_to_people[slot_id].append(m)
+
+    # Greedily fill groups from the most popular slots first
+    combos = []
+    assigned = set()
+    for slot in sorted(slot_to_people, key=lambda s: len(slot_to_people[s]), reverse=True):
+        candidates = [m for m in slot_to_people[slot] if m["id"] not in assigned]
+        if len(candidates) < 2:
+            continue
+
+        for combo in split_into_groups(candidates):
+            assigned.update(m["id"] for m in combo)
+            combos.append(combo)
+    return combos
+
+def build_groups(rows):
+    """Build people from response rows and return (groups, people)."""
+    columns = list(rows[0]) if rows else []
+
+    # Identify availability columns (everything after "Faith Studies Led")
+    try:
+        led_col_index = columns.index("Please indicate which faith studies you have led:")
+        availability_cols = columns[led_col_index+1:]
+    except ValueError:
+        # look for columns containing time slots
+        availability_cols = [col for col in columns if 'timeslot' in col.lower() or '[' in col and ']' in col]
+
+    # Intern availability slots as bit positions; names are only decoded for the response
+    slot_names = availability_cols
+    masks = {}
+    led_sets = {}
+
+    people = []
+    for row in rows:
+        first = row.get("First Name", "")
+        last = row.get("Last Name", "")
+        completed_set = parse_study_list(row.get("Please indicate which faith studies you've completed.", ""))
+        next_study = get_next_faith_study(completed_set)
+        avail = {col: cell_text(row[col]) for col in availability_cols}
+        person_id = f"{first}_{last}_{len(people)}"
+        masks[person_id] = availability_mask(avail.values())
+        led_sets[person_id] = parse_study_list(row.get("Please indicate which faith studies you have led:", ""))
+        person = {
+            "id": person_id,
+            "first": first,
+            "last": last,
+            "gender": cell_text(row.get("Please indicate your gender.")).lower(),
+            "email": row.get("E-mail Address", ""),
+            "phone": row.get("Cell Phone Number", ""),
+            "year": row.get("What year of study are you currently in?", ""),
+            "program": row.get("What is your program of study?", ""),
+            "religion": row.get("Which religion/faith do you most identify with?", ""),
+            "next_study": next_study,
+            "willing_lead": cell_text(row.get("Are you willing to lead a Faith Study?")).lower() == "yes",
+            "already_led": row.get("Please indicate which faith studies you have led:", ""),
+            "avail": avail,
+            "avail_slots": mask_to_slots(masks[person_id], slot_names)
+        }
+        people.append(person)
+
+    # Group people by gender + next faith study
+    grouped = defaultdict(list)
+    for p in people:
+        # Only include people who have a next study and valid gender
+        if p["next_study"] and p["gender"] and p["gender"].strip():
+            grouped[(p["gender"], p["next_study"])].append(p)
+
+    results = []
+    group_counter = 1
+
+    for (gender, study), members in grouped.items():
+        for combo in group_bucket(members, masks, len(slot_names)):
+            common_mask = reduce(and_, (masks[m["id"]] for m in combo))
+            common = mask_to_slots(common_mask, slot_names)
+
+            leader = None
+            for m in combo:
+                if m["willing_lead"] and not has_led(study, led_sets[m["id"]]):
+                    leader = m["id"]
+                    break
+
+            group_data = {
+                "id": f"G{group_counter}",
+                "faith_study": study.capitalize(),
+                "gender": gender.capitalize(),
+                "leader": leader,
+                "members": [m["id"] for m in combo],
+                "common_availabilities": common,
+                "member_details": {m["id"]: {
+                    "name": f"{m['first']} {m['last']}",
+                    "email": m["email"],
+                    "phone": m["phone"],
+                    "year": m["year"],
+                    "program": m["program"]
+                } for m in combo}
+            }
+            results.append(group_data)
+            group_counter += 1
+
+    return results, people